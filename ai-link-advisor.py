@@ -8,10 +8,19 @@ import os
 import re
 import json
 import sqlite3
+import hashlib
+import time
+import shutil
+import tempfile
+import cProfile
+import pstats
+import threading
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import argparse
 import subprocess
 
@@ -34,18 +43,124 @@ class LinkPattern:
     usage_count: int
     success_rate: float
 
+class StageProfiler:
+    """Collects wall-clock time and call counts per pipeline stage"""
+    
+    def __init__(self, trace: bool = False, profile_threads: bool = False):
+        self.trace = trace
+        self.profile_threads = profile_threads
+        self.stages = {}  # stage name -> [calls, total_seconds]
+        self.counters = {}
+        self.events = []
+        self.thread_profiles = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block of work and attribute it to the given stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                entry = self.stages.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += end - start
+                if self.trace:
+                    self.events.append({
+                        "name": name,
+                        "cat": name.split('.')[0],
+                        "ph": "X",
+                        "ts": (start - self._origin) * 1e6,
+                        "dur": (end - start) * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident()
+                    })
+    
+    def in_thread(self, func):
+        """Wrap work submitted to a thread pool so cProfile also sees it"""
+        if not self.profile_threads:
+            return func
+        
+        def profiled(*args, **kwargs):
+            thread_profile = cProfile.Profile()
+            try:
+                return thread_profile.runcall(func, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.thread_profiles.append(thread_profile)
+        
+        return profiled
+    
+    def count(self, name: str, amount: int = 1):
+        """Increment a named counter (files scanned, links found, ...)"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def summary(self) -> Dict:
+        """Return the collected stage timings and counters"""
+        return {
+            "stages": {
+                name: {"calls": calls, "total_ms": round(total * 1000, 3)}
+                for name, (calls, total) in sorted(self.stages.items(), key=lambda item: -item[1][1])
+            },
+            "counters": dict(sorted(self.counters.items()))
+        }
+    
+    def print_summary(self):
+        """Print a per-stage time and call-count breakdown"""
+        if not self.stages:
+            return
+        
+        print("⏱️  Stage breakdown:")
+        print(f"  {'Stage':<32} {'Calls':>8} {'Total ms':>12} {'Avg ms':>10}")
+        for name, data in self.summary()["stages"].items():
+            avg = data["total_ms"] / data["calls"] if data["calls"] else 0.0
+            print(f"  {name:<32} {data['calls']:>8} {data['total_ms']:>12.1f} {avg:>10.2f}")
+        for name, value in sorted(self.counters.items()):
+            print(f"  {name:<32} {value:>8}")
+        print("")
+    
+    def write_trace(self, output_file: Path):
+        """Write recorded stage events as Chrome trace-event JSON"""
+        with open(output_file, 'w') as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
 class AILinkAdvisor:
     """Main AI Link Advisor class"""
     
-    def __init__(self, cortex_path: str, framework_path: str):
+    def __init__(self, cortex_path: str, framework_path: str, profiler: Optional[StageProfiler] = None,
+                 use_cache: bool = True, cache_size: int = 5000):
         self.cortex_path = Path(cortex_path)
         self.framework_path = Path(framework_path)
         self.db_path = self.framework_path / "ai_link_advisor.db"
         self.patterns_cache = {}
+        self.profiler = profiler or StageProfiler()
+        self.use_cache = use_cache
+        self.cache_size = cache_size
         self._init_database()
     
+    def _markdown_files(self) -> List[Path]:
+        """List all markdown files in the vault"""
+        with self.profiler.stage("vault.walk"):
+            md_files = list(self.cortex_path.rglob("*.md"))
+        self.profiler.count("vault.files_listed", len(md_files))
+        return md_files
+    
+    def _read_text(self, file_path: Path) -> str:
+        """Read a vault file, recording the read"""
+        with self.profiler.stage("file.read"):
+            return Path(file_path).read_text(encoding='utf-8')
+    
     def _init_database(self):
         """Initialize SQLite database for learning and caching"""
+        with self.profiler.stage("db.init"):
+            self._create_tables()
+    
+    def _create_tables(self):
+        """Create the learning and caching tables"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -85,6 +200,38 @@ class AILinkAdvisor:
             )
         ''')
         
+        # Tables for the persistent suggestion cache
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS vault_index (
+                path TEXT PRIMARY KEY,
+                stem TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS advisor_state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS suggestion_cache (
+                cache_key TEXT PRIMARY KEY,
+                normalized_target TEXT NOT NULL,
+                context_hash TEXT NOT NULL,
+                index_generation INTEGER NOT NULL,
+                suggestions TEXT NOT NULL,
+                hit_count INTEGER DEFAULT 0,
+                last_used REAL NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_suggestion_cache_target ON suggestion_cache (normalized_target)')
+        
         conn.commit()
         conn.close()
     
@@ -95,17 +242,19 @@ class AILinkAdvisor:
         link_map = {}
         concept_map = {}
         
-        for md_file in self.cortex_path.rglob("*.md"):
+        for md_file in self._markdown_files():
             try:
-                content = md_file.read_text(encoding='utf-8')
-                
-                # Extract concepts from filename and content
-                concepts = self._extract_concepts(md_file, content)
-                concept_map[str(md_file)] = concepts
+                content = self._read_text(md_file)
                 
-                # Find all links in the file
-                wiki_links = re.findall(r'\[\[([^\]]+)\]\]', content)
-                md_links = re.findall(r'\[([^\]]*)\]\(([^)]+)\)', content)
+                with self.profiler.stage("regex.extract"):
+                    # Extract concepts from filename and content
+                    concepts = self._extract_concepts(md_file, content)
+                    concept_map[str(md_file)] = concepts
+                    
+                    # Find all links in the file
+                    wiki_links = re.findall(r'\[\[([^\]]+)\]\]', content)
+                    md_links = re.findall(r'\[([^\]]*)\]\(([^)]+)\)', content)
+                self.profiler.count("links.extracted", len(wiki_links) + len(md_links))
                 
                 for link in wiki_links:
                     clean_link = link.split('|')[0].split('#')[0].strip()
@@ -123,7 +272,8 @@ class AILinkAdvisor:
                 print(f"Warning: Could not analyze {md_file}: {e}")
         
         # Store patterns in database
-        self._store_learned_patterns(link_map, concept_map)
+        with self.profiler.stage("db.store_patterns"):
+            self._store_learned_patterns(link_map, concept_map)
         return link_map
     
     def _extract_concepts(self, file_path: Path, content: str) -> List[str]:
@@ -179,20 +329,518 @@ class AILinkAdvisor:
         suggestions = []
         
         # Load current patterns
-        self._load_patterns()
+        with self.profiler.stage("db.load_patterns"):
+            self._load_patterns()
         
-        for broken_link in broken_links:
-            link_text = broken_link.get('link', '').strip('[]()').split('|')[0]
-            file_path = broken_link.get('file', '')
-            line_num = broken_link.get('line', 0)
-            
-            # Multiple suggestion strategies
-            suggestions.extend(self._fuzzy_match_suggestions(link_text, file_path, line_num))
-            suggestions.extend(self._semantic_suggestions(link_text, file_path, line_num))
-            suggestions.extend(self._pattern_based_suggestions(link_text, file_path, line_num))
+        generation = self._refresh_vault_index() if self.use_cache else 0
+        rejected = self._load_rejected_fixes()
+        
+        # One connection for all cache traffic of this call; writes are batched into
+        # a single transaction at the end so strategies can still read the database
+        conn = sqlite3.connect(self.db_path) if self.use_cache else None
+        cursor = conn.cursor() if conn else None
+        source_lines = {}
+        hits = []
+        stores = []
+        
+        try:
+            for broken_link in broken_links:
+                link_text = broken_link.get('link', '').strip('[]()').split('|')[0]
+                file_path = broken_link.get('file', '')
+                line_num = broken_link.get('line', 0)
+                self.profiler.count("links.broken")
+                
+                cache_key = None
+                if cursor:
+                    context_hash = self._context_hash(file_path, line_num, source_lines)
+                    cache_key = self._suggestion_cache_key(link_text, file_path, context_hash, generation)
+                    cached = self._cache_lookup(cursor, cache_key, link_text, file_path, line_num)
+                    if cached is not None:
+                        hits.append(cache_key)
+                        suggestions.extend(self._without_rejected(cached, rejected))
+                        continue
+                
+                # Multiple suggestion strategies
+                link_suggestions = []
+                with self.profiler.stage("strategy.fuzzy_match"):
+                    link_suggestions.extend(self._fuzzy_match_suggestions(link_text, file_path, line_num))
+                with self.profiler.stage("strategy.semantic"):
+                    link_suggestions.extend(self._semantic_suggestions(link_text, file_path, line_num))
+                with self.profiler.stage("strategy.pattern_based"):
+                    link_suggestions.extend(self._pattern_based_suggestions(link_text, file_path, line_num))
+                
+                # Cache the unranked, unfiltered list so hits rank exactly like misses
+                if cache_key:
+                    stores.append((cache_key, link_text, context_hash, generation, link_suggestions))
+                suggestions.extend(self._without_rejected(link_suggestions, rejected))
             
+            if cursor:
+                self._cache_store(cursor, stores)
+                self._touch_cache_entries(cursor, hits)
+                self._evict_cache(cursor)
+                with self.profiler.stage("cache.commit"):
+                    conn.commit()
+        finally:
+            if conn:
+                conn.close()
+        
         # Rank and deduplicate suggestions
-        return self._rank_suggestions(suggestions)
+        with self.profiler.stage("rank"):
+            return self._rank_suggestions(suggestions)
+    
+    def _normalize_target(self, link: str) -> str:
+        """Normalize a link target for cache lookups (no alias, anchor or extension)"""
+        if '](' in link:
+            # Markdown link: keep only the link destination
+            link = link.split('](', 1)[1]
+        target = link.strip('[]()').split('|')[0].split('#')[0].strip()
+        if target.lower().endswith('.md'):
+            target = target[:-3]
+        return ' '.join(target.split()).lower()
+    
+    def _context_hash(self, file_path: str, line_num: int, source_lines: Dict[str, List[str]]) -> str:
+        """Hash the lines surrounding a broken link, reading each source file once"""
+        if file_path not in source_lines:
+            try:
+                source_lines[file_path] = self._read_text(file_path).splitlines(keepends=True)
+            except Exception:
+                source_lines[file_path] = []
+        lines = source_lines[file_path]
+        
+        # Same window as the semantic strategy
+        start = max(0, line_num - 3)
+        end = min(len(lines), line_num + 3)
+        context = ' '.join(lines[start:end])
+        return hashlib.sha1(context.encode('utf-8')).hexdigest()
+    
+    def _suggestion_cache_key(self, link_text: str, file_path: str, context_hash: str, generation: int) -> str:
+        """Build the cache key from every input the strategies read
+        
+        The fuzzy strategy compares the raw link text and the pattern strategy
+        reads the whole source file, so both are part of the key next to the
+        context fingerprint and the index generation.
+        """
+        key = json.dumps([link_text, file_path, context_hash, generation])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+    
+    def _refresh_vault_index(self) -> int:
+        """Sync the persisted vault index and return its generation number
+        
+        The generation is bumped when any note is added, removed or modified, or
+        when the learned link patterns change. The semantic and pattern strategies
+        read every note and the whole source file, so any edit can change results.
+        """
+        with self.profiler.stage("vault.index"):
+            current = {}
+            for md_file in self._markdown_files():
+                try:
+                    stat = md_file.stat()
+                except OSError:
+                    continue
+                current[str(md_file)] = (md_file.stem.lower(), stat.st_mtime_ns, stat.st_size)
+            
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT path, mtime_ns, size FROM vault_index')
+            stored = {path: (mtime_ns, size) for path, mtime_ns, size in cursor.fetchall()}
+            
+            cursor.execute("SELECT value FROM advisor_state WHERE key = 'index_generation'")
+            row = cursor.fetchone()
+            generation = int(row[0]) if row else 0
+            
+            cursor.execute("SELECT value FROM advisor_state WHERE key = 'patterns_hash'")
+            row = cursor.fetchone()
+            patterns_hash = self._patterns_hash(cursor)
+            
+            changed = {path: (mtime_ns, size) for path, (_, mtime_ns, size) in current.items()} != stored
+            if changed or row is None or row[0] != patterns_hash:
+                generation += 1
+                # Entries from older generations can never match again
+                cursor.execute('DELETE FROM suggestion_cache WHERE index_generation < ?', (generation,))
+            
+            removed = set(stored) - set(current)
+            cursor.executemany('DELETE FROM vault_index WHERE path = ?', [(path,) for path in removed])
+            cursor.executemany('''
+                INSERT OR REPLACE INTO vault_index (path, stem, mtime_ns, size)
+                VALUES (?, ?, ?, ?)
+            ''', [(path, stem, mtime_ns, size) for path, (stem, mtime_ns, size) in current.items()
+                  if stored.get(path) != (mtime_ns, size)])
+            cursor.executemany('INSERT OR REPLACE INTO advisor_state (key, value) VALUES (?, ?)',
+                               [('index_generation', str(generation)), ('patterns_hash', patterns_hash)])
+            
+            conn.commit()
+            conn.close()
+        
+        return generation
+    
+    def _patterns_hash(self, cursor) -> str:
+        """Fingerprint the learned link patterns"""
+        cursor.execute('SELECT pattern, target_template, usage_count, success_count FROM link_patterns ORDER BY pattern')
+        return hashlib.sha1(json.dumps(cursor.fetchall()).encode('utf-8')).hexdigest()
+    
+    def _cache_lookup(self, cursor, cache_key: str, link_text: str, file_path: str,
+                      line_num: int) -> Optional[List[LinkSuggestion]]:
+        """Return cached suggestions, or None on a miss"""
+        with self.profiler.stage("cache.lookup"):
+            cursor.execute('SELECT suggestions FROM suggestion_cache WHERE cache_key = ?', (cache_key,))
+            row = cursor.fetchone()
+        
+        if row is None:
+            self.profiler.count("cache.misses")
+            return None
+        
+        self.profiler.count("cache.hits")
+        return [LinkSuggestion(broken_link=link_text, file_path=file_path, line_number=line_num, **item)
+                for item in json.loads(row[0])]
+    
+    def _cache_store(self, cursor, entries: List[Tuple[str, str, str, int, List[LinkSuggestion]]]):
+        """Persist computed suggestions for broken links in one batch"""
+        if not entries:
+            return
+        
+        with self.profiler.stage("cache.store"):
+            now = time.time()
+            rows = []
+            for cache_key, link_text, context_hash, generation, suggestions in entries:
+                payload = [{
+                    "suggested_target": s.suggested_target,
+                    "confidence": s.confidence,
+                    "reasoning": s.reasoning,
+                    "context": s.context
+                } for s in suggestions]
+                rows.append((cache_key, self._normalize_target(link_text), context_hash, generation,
+                             json.dumps(payload), now))
+            
+            cursor.executemany('''
+                INSERT OR REPLACE INTO suggestion_cache
+                (cache_key, normalized_target, context_hash, index_generation, suggestions, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+    
+    def _touch_cache_entries(self, cursor, cache_keys: List[str]):
+        """Bump hit counts and LRU timestamps for all cache hits in one batch"""
+        if not cache_keys:
+            return
+        
+        with self.profiler.stage("cache.touch"):
+            now = time.time()
+            cursor.executemany('''
+                UPDATE suggestion_cache SET hit_count = hit_count + 1, last_used = ?
+                WHERE cache_key = ?
+            ''', [(now, cache_key) for cache_key in cache_keys])
+    
+    def _evict_cache(self, cursor):
+        """Drop least recently used cache entries beyond the size bound"""
+        with self.profiler.stage("cache.evict"):
+            cursor.execute('''
+                DELETE FROM suggestion_cache WHERE cache_key NOT IN (
+                    SELECT cache_key FROM suggestion_cache ORDER BY last_used DESC LIMIT ?
+                )
+            ''', (self.cache_size,))
+            if cursor.rowcount > 0:
+                self.profiler.count("cache.evicted", cursor.rowcount)
+    
+    def _load_rejected_fixes(self) -> set:
+        """Load (normalized target, fix) pairs that were rejected and never accepted"""
+        with self.profiler.stage("db.load_history"):
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT broken_link, suggested_fix, was_accepted FROM broken_link_history')
+            outcomes = {}
+            for broken_link, suggested_fix, was_accepted in cursor.fetchall():
+                key = (self._normalize_target(broken_link), suggested_fix)
+                outcomes[key] = outcomes.get(key, False) or bool(was_accepted)
+            
+            conn.close()
+        
+        return {key for key, accepted in outcomes.items() if not accepted}
+    
+    def _without_rejected(self, suggestions: List[LinkSuggestion], rejected: set) -> List[LinkSuggestion]:
+        """Filter out fixes that were previously rejected for the same target"""
+        return [s for s in suggestions
+                if (self._normalize_target(s.broken_link), s.suggested_target) not in rejected]
+    
+    def record_outcomes(self, accepted: List[LinkSuggestion], rejected: List[LinkSuggestion]):
+        """Record accepted and rejected suggestions in broken_link_history"""
+        with self.profiler.stage("db.record_outcomes"):
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            outcomes = [(s, True) for s in accepted] + [(s, False) for s in rejected]
+            cursor.executemany('''
+                INSERT INTO broken_link_history (broken_link, suggested_fix, was_accepted, file_path, context)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(s.broken_link, s.suggested_target, was_accepted, s.file_path, s.context[:500])
+                  for s, was_accepted in outcomes])
+            
+            # Cached rankings for these targets are outdated now
+            cursor.executemany('DELETE FROM suggestion_cache WHERE normalized_target = ?',
+                               [(self._normalize_target(s.broken_link),) for s, _ in outcomes])
+            
+            conn.commit()
+            conn.close()
+    
+    def _group_by_broken_link(self, suggestions: List[LinkSuggestion]) -> Dict[Tuple[str, str, int], List[LinkSuggestion]]:
+        """Group suggestions by the broken link occurrence they fix"""
+        grouped = {}
+        for suggestion in suggestions:
+            key = (suggestion.broken_link, suggestion.file_path, suggestion.line_number)
+            grouped.setdefault(key, []).append(suggestion)
+        return grouped
+    
+    def review_suggestions(self, suggestions: List[LinkSuggestion]):
+        """Interactively accept or reject suggestions and record the outcome"""
+        accepted, rejected = self.prompt_for_fixes(suggestions)
+        self.record_outcomes(accepted, rejected)
+        print(f"\n✅ Recorded {len(accepted)} accepted and {len(rejected)} rejected suggestions")
+    
+    def prompt_for_fixes(self, suggestions: List[LinkSuggestion]) -> Tuple[List[LinkSuggestion], List[LinkSuggestion]]:
+        """Ask which suggestion to accept for each broken link"""
+        grouped = self._group_by_broken_link(suggestions)
+        
+        accepted, rejected = [], []
+        for (broken_link, file_path, line_num), options in grouped.items():
+            print(f"\n🔗 {Path(file_path).name}:{line_num} → `{broken_link}`")
+            for i, option in enumerate(options, 1):
+                print(f"  {i}. {option.suggested_target} ({option.confidence:.1%}) - {option.reasoning}")
+            
+            try:
+                choice = input("Accept [number], reject all [r], skip [Enter], quit [q]: ").strip().lower()
+            except (EOFError, KeyboardInterrupt):
+                # No terminal (pipeline, CI) or Ctrl-C: treat as quit
+                print("")
+                break
+            if choice == 'q':
+                break
+            if choice == 'r':
+                rejected.extend(options)
+            elif choice.isdigit() and 1 <= int(choice) <= len(options):
+                chosen = options[int(choice) - 1]
+                accepted.append(chosen)
+                rejected.extend(o for o in options if o is not chosen)
+        
+        return accepted, rejected
+    
+    def select_fixes(self, suggestions: List[LinkSuggestion],
+                     min_confidence: float) -> Tuple[List[LinkSuggestion], List[LinkSuggestion]]:
+        """Pick the best suggestion per broken link, skipping low-confidence and ambiguous ones"""
+        grouped = self._group_by_broken_link(suggestions)
+        
+        selected, skipped = [], []
+        for (_, file_path, _), options in grouped.items():
+            # A note never fixes a link by pointing at itself
+            source = Path(file_path).stem.lower()
+            options = [o for o in options if Path(self._normalize_target(o.suggested_target)).name != source]
+            if not options:
+                continue
+            options = sorted(options, key=lambda s: s.confidence, reverse=True)
+            best = options[0]
+            tied = [o for o in options[1:]
+                    if o.confidence == best.confidence and o.suggested_target != best.suggested_target]
+            if best.confidence < min_confidence or tied:
+                skipped.append(best)
+            else:
+                selected.append(best)
+        
+        return selected, skipped
+    
+    def apply_fixes(self, fixes: List[LinkSuggestion], rejected: Optional[List[LinkSuggestion]] = None,
+                    workers: Optional[int] = None,
+                    dry_run: bool = False) -> Tuple[List[LinkSuggestion], List[LinkSuggestion]]:
+        """Rewrite broken links in place with one read-modify-write per file"""
+        note_paths = self._note_paths()
+        
+        # Never rewrite one broken link into another or an ambiguous one
+        applied, failed = [], []
+        by_file = {}
+        for fix in fixes:
+            if len(self._resolve_target(fix.suggested_target, note_paths)) == 1:
+                by_file.setdefault(fix.file_path, []).append(fix)
+            else:
+                failed.append(fix)
+        
+        apply_file = self.profiler.in_thread(self._apply_file_fixes)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(apply_file, file_path, file_fixes, note_paths, dry_run)
+                       for file_path, file_fixes in by_file.items()]
+            for future in futures:
+                file_applied, file_failed = future.result()
+                applied.extend(file_applied)
+                failed.extend(file_failed)
+        
+        if not dry_run:
+            self._update_vault_index({fix.file_path for fix in applied})
+            self.record_outcomes(applied, rejected or [])
+        
+        return applied, failed
+    
+    def _note_paths(self) -> Dict[str, List[Path]]:
+        """Map lowercase note stems to the vault files carrying them"""
+        note_paths = {}
+        for md_file in self._markdown_files():
+            note_paths.setdefault(md_file.stem.lower(), []).append(md_file)
+        return note_paths
+    
+    def _resolve_target(self, target: str, note_paths: Dict[str, List[Path]]) -> List[Path]:
+        """Return the vault notes a link target points to"""
+        return note_paths.get(Path(self._normalize_target(target)).name, [])
+    
+    def _apply_file_fixes(self, file_path: str, fixes: List[LinkSuggestion], note_paths: Dict[str, List[Path]],
+                          dry_run: bool) -> Tuple[List[LinkSuggestion], List[LinkSuggestion]]:
+        """Apply all fixes for one file and write it back atomically"""
+        with self.profiler.stage("apply.file"):
+            try:
+                with self.profiler.stage("file.read"):
+                    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+                        lines = f.read().splitlines(keepends=True)
+            except Exception as e:
+                print(f"Warning: Could not read {file_path}: {e}")
+                return [], list(fixes)
+            
+            applied, failed = [], []
+            for fix in fixes:
+                index = fix.line_number - 1
+                if 0 <= index < len(lines):
+                    rewritten = self._rewrite_links(lines[index], fix, note_paths)
+                    if rewritten != lines[index]:
+                        lines[index] = rewritten
+                        applied.append(fix)
+                        continue
+                failed.append(fix)
+            
+            if applied and not dry_run:
+                try:
+                    self._atomic_write(Path(file_path), ''.join(lines))
+                except OSError as e:
+                    print(f"Warning: Could not write {file_path}: {e}")
+                    return [], list(fixes)
+            self.profiler.count("apply.links_rewritten", len(applied))
+        
+        return applied, failed
+    
+    def _rewrite_links(self, line: str, fix: LinkSuggestion, note_paths: Dict[str, List[Path]]) -> str:
+        """Point links to the broken target at the suggested one, keeping aliases and anchors"""
+        broken = self._normalize_target(fix.broken_link)
+        
+        def replace_wiki_link(match):
+            target, separator, alias = match.group(1).partition('|')
+            path, hash_sign, anchor = target.partition('#')
+            new_target = self._wiki_target(fix, note_paths)
+            if self._normalize_target(path) != broken or new_target is None:
+                return match.group(0)
+            return f"[[{new_target}{hash_sign}{anchor}{separator}{alias}]]"
+        
+        def replace_md_link(match):
+            text, target = match.group(1), match.group(2)
+            path, hash_sign, anchor = target.partition('#')
+            new_path = self._markdown_target(fix, note_paths)
+            if not path or self._normalize_target(path) != broken or new_path is None:
+                return match.group(0)
+            return f"[{text}]({new_path}{hash_sign}{anchor})"
+        
+        line = re.sub(r'\[\[([^\]]+)\]\]', replace_wiki_link, line)
+        return re.sub(r'\[([^\]]*)\]\(([^)]+)\)', replace_md_link, line)
+    
+    def _wiki_target(self, fix: LinkSuggestion, note_paths: Dict[str, List[Path]]) -> Optional[str]:
+        """Stem of the suggested note for wiki links, None if not unique"""
+        candidates = self._resolve_target(fix.suggested_target, note_paths)
+        if len(candidates) != 1:
+            return None
+        return candidates[0].stem
+    
+    def _markdown_target(self, fix: LinkSuggestion, note_paths: Dict[str, List[Path]]) -> Optional[str]:
+        """Relative path from the linking file to the suggested note, None if not unique"""
+        candidates = self._resolve_target(fix.suggested_target, note_paths)
+        if len(candidates) != 1:
+            return None
+        relative = os.path.relpath(candidates[0], Path(fix.file_path).parent)
+        # The validator resolves targets not starting with '.' from the vault root
+        return relative if relative.startswith('..') else f"./{relative}"
+    
+    def _atomic_write(self, file_path: Path, content: str):
+        """Write a file via temp file and rename so readers never see partial content"""
+        with self.profiler.stage("file.write"):
+            fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                shutil.copymode(file_path, tmp_path)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+    
+    def _update_vault_index(self, file_paths: set):
+        """Refresh the persisted vault index entries for rewritten files
+        
+        Rewritten notes are inputs to every suggestion, so the index generation
+        is bumped to retire cached entries computed from their old content.
+        """
+        if not file_paths:
+            return
+        
+        with self.profiler.stage("db.update_index"):
+            rows = []
+            for file_path in file_paths:
+                path = Path(file_path)
+                stat = path.stat()
+                rows.append((str(path), path.stem.lower(), stat.st_mtime_ns, stat.st_size))
+            
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.executemany('''
+                INSERT OR REPLACE INTO vault_index (path, stem, mtime_ns, size)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+            
+            cursor.execute("SELECT value FROM advisor_state WHERE key = 'index_generation'")
+            row = cursor.fetchone()
+            generation = (int(row[0]) if row else 0) + 1
+            cursor.execute('INSERT OR REPLACE INTO advisor_state (key, value) VALUES (?, ?)',
+                           ('index_generation', str(generation)))
+            cursor.execute('DELETE FROM suggestion_cache WHERE index_generation < ?', (generation,))
+            
+            conn.commit()
+            conn.close()
+    
+    def update_broken_links_report(self, report: Dict, applied: List[LinkSuggestion], output_dir: Path) -> Path:
+        """Write a new broken links report without the links fixed by apply"""
+        # Only links whose new target resolves to exactly one note count as fixed
+        note_paths = self._note_paths()
+        fixed = {(fix.file_path, fix.line_number, self._normalize_target(fix.broken_link)) for fix in applied
+                 if len(self._resolve_target(fix.suggested_target, note_paths)) == 1}
+        remaining = [entry for entry in report.get("broken_links", [])
+                     if (entry.get('file', ''), entry.get('line', 0),
+                         self._normalize_target(entry.get('link', ''))) not in fixed]
+        fixed_count = len(report.get("broken_links", [])) - len(remaining)
+        
+        updated = dict(report)
+        updated["timestamp"] = datetime.now().astimezone().isoformat(timespec='seconds')
+        updated["broken_links"] = remaining
+        updated["broken_links_count"] = max(0, report.get("broken_links_count", 0) - fixed_count)
+        updated["valid_links"] = report.get("valid_links", 0) + fixed_count
+        
+        # Same formula as calculate_health_score in test-manager-enhanced.sh
+        total_items = report.get("total_links", 0) + report.get("total_files_scanned", 0)
+        try:
+            score = float(str(report.get("health_score", "0")).rstrip('%'))
+            if total_items:
+                score = min(100.0, score + fixed_count * 100 / total_items)
+            updated["health_score"] = f"{score:.1f}%"
+        except ValueError:
+            pass
+        
+        output_file = output_dir / f"broken_links_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(updated, f, indent=2)
+        
+        return output_file
     
     def _fuzzy_match_suggestions(self, broken_link: str, file_path: str, line_num: int) -> List[LinkSuggestion]:
         """Generate suggestions based on fuzzy string matching"""
@@ -200,7 +848,7 @@ class AILinkAdvisor:
         
         # Find all existing files
         existing_files = []
-        for md_file in self.cortex_path.rglob("*.md"):
+        for md_file in self._markdown_files():
             filename = md_file.stem
             existing_files.append((filename, str(md_file)))
         
@@ -226,8 +874,7 @@ class AILinkAdvisor:
         
         try:
             # Read context from the file
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            lines = self._read_text(file_path).splitlines(keepends=True)
                 
             # Get context around the broken link
             start = max(0, line_num - 3)
@@ -238,10 +885,11 @@ class AILinkAdvisor:
             context_concepts = self._extract_concepts_from_text(context)
             
             # Find files with similar concepts
-            for md_file in self.cortex_path.rglob("*.md"):
+            for md_file in self._markdown_files():
                 try:
-                    file_content = md_file.read_text(encoding='utf-8')
-                    file_concepts = self._extract_concepts_from_text(file_content)
+                    file_content = self._read_text(md_file)
+                    with self.profiler.stage("regex.extract"):
+                        file_concepts = self._extract_concepts_from_text(file_content)
                     
                     # Calculate concept overlap
                     overlap = len(set(context_concepts) & set(file_concepts))
@@ -270,19 +918,20 @@ class AILinkAdvisor:
         suggestions = []
         
         # Load patterns from database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT pattern, target_template, usage_count, 
-                   CASE WHEN usage_count > 0 THEN success_count * 1.0 / usage_count ELSE 0 END as success_rate
-            FROM link_patterns 
-            WHERE usage_count > 2 
-            ORDER BY usage_count DESC
-        ''')
-        
-        patterns = cursor.fetchall()
-        conn.close()
+        with self.profiler.stage("db.query_patterns"):
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT pattern, target_template, usage_count, 
+                       CASE WHEN usage_count > 0 THEN success_count * 1.0 / usage_count ELSE 0 END as success_rate
+                FROM link_patterns 
+                WHERE usage_count > 2 
+                ORDER BY usage_count DESC
+            ''')
+            
+            patterns = cursor.fetchall()
+            conn.close()
         
         for pattern, target_template, usage_count, success_rate in patterns:
             if self._pattern_matches(pattern, broken_link, file_path):
@@ -342,17 +991,17 @@ class AILinkAdvisor:
         """Check if a pattern matches the current context"""
         if pattern.startswith("concepts:"):
             concepts = pattern.split("concepts:")[1].split(",")
-            file_concepts = self._extract_concepts_from_text(Path(file_path).read_text(encoding='utf-8'))
+            file_concepts = self._extract_concepts_from_text(self._read_text(file_path))
             return len(set(concepts) & set(file_concepts)) > 0
         
         return False
     
     def _rank_suggestions(self, suggestions: List[LinkSuggestion]) -> List[LinkSuggestion]:
         """Rank suggestions by confidence and deduplicate"""
-        # Group by broken_link
+        # Group by broken link occurrence
         grouped = {}
         for suggestion in suggestions:
-            key = (suggestion.broken_link, suggestion.file_path)
+            key = (suggestion.broken_link, suggestion.file_path, suggestion.line_number)
             if key not in grouped:
                 grouped[key] = []
             grouped[key].append(suggestion)
@@ -443,13 +1092,71 @@ def main():
                        help="Output file for suggestions")
     parser.add_argument("--confidence", type=float, default=0.7, 
                        help="Minimum confidence for suggestions")
+    parser.add_argument("--interactive", action="store_true",
+                       help="Choose which suggestions to apply interactively")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Show which links apply would rewrite without writing files")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="Number of files rewritten in parallel by apply")
+    parser.add_argument("--review", action="store_true",
+                       help="Interactively accept or reject generated suggestions")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Recompute all suggestions instead of using the suggestion cache")
+    parser.add_argument("--cache-size", type=int, default=5000,
+                       help="Maximum number of cached suggestion entries")
+    parser.add_argument("--profile", choices=["pstats", "trace"],
+                       help="Write cProfile stats or a Chrome trace-event JSON")
+    parser.add_argument("--profile-dir", default="test-results",
+                       help="Directory for profiling output")
     
     args = parser.parse_args()
     
     print("🤖 Cortex AI Link Advisor")
     print("=" * 30)
     
-    advisor = AILinkAdvisor(args.cortex_path, ".")
+    profiler = StageProfiler(trace=args.profile == "trace", profile_threads=args.profile == "pstats")
+    cprofile = cProfile.Profile() if args.profile == "pstats" else None
+    
+    if cprofile:
+        cprofile.enable()
+    try:
+        run_command(args, profiler)
+    finally:
+        if cprofile:
+            cprofile.disable()
+        profiler.print_summary()
+        if args.profile:
+            write_profile_output(args, profiler, cprofile)
+
+def write_profile_output(args, profiler: StageProfiler, cprofile: Optional[cProfile.Profile]):
+    """Write profiling results into the profile directory"""
+    profile_dir = Path(args.profile_dir)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    if cprofile:
+        output_file = profile_dir / f"profile_{args.command}_{timestamp}.pstats"
+        # cProfile only sees the main thread, so merge the worker profiles
+        stats = pstats.Stats(cprofile)
+        for thread_profile in profiler.thread_profiles:
+            stats.add(thread_profile)
+        stats.dump_stats(str(output_file))
+    else:
+        output_file = profile_dir / f"trace_{args.command}_{timestamp}.json"
+        profiler.write_trace(output_file)
+    
+    print(f"📈 Profile saved to: {output_file}")
+
+def load_latest_report() -> Dict:
+    """Load the most recent broken links report"""
+    latest_report = max(Path("test-results").glob("broken_links_*.json"))
+    with open(latest_report) as f:
+        return json.load(f)
+
+def run_command(args, profiler: StageProfiler):
+    """Dispatch the selected CLI command"""
+    advisor = AILinkAdvisor(args.cortex_path, ".", profiler=profiler,
+                            use_cache=not args.no_cache, cache_size=args.cache_size)
     
     if args.command == "analyze":
         link_patterns = advisor.analyze_existing_links()
@@ -457,9 +1164,8 @@ def main():
         
     elif args.command == "suggest":
         # Get broken links from latest report
-        latest_report = max(Path("test-results").glob("broken_links_*.json"))
-        with open(latest_report) as f:
-            data = json.load(f)
+        with profiler.stage("report.load"):
+            data = load_latest_report()
             broken_links = data["broken_links"]
         
         if not broken_links:
@@ -467,14 +1173,47 @@ def main():
             return
         
         suggestions = advisor.suggest_fixes_for_broken_links(broken_links)
-        advisor.generate_suggestions_report(suggestions, args.output)
+        with profiler.stage("report.write"):
+            advisor.generate_suggestions_report(suggestions, args.output)
         
         print(f"🎯 Generated {len(suggestions)} suggestions")
         print(f"📋 Report saved to: {args.output}")
         
+        if args.review:
+            advisor.review_suggestions(suggestions)
+        
     elif args.command == "apply":
-        print("🚧 Auto-application coming in Phase 3!")
-        print("For now, please review suggestions manually.")
+        with profiler.stage("report.load"):
+            data = load_latest_report()
+            broken_links = data["broken_links"]
+        
+        if not broken_links:
+            print("✅ No broken links found!")
+            return
+        
+        suggestions = advisor.suggest_fixes_for_broken_links(broken_links)
+        
+        if args.interactive:
+            fixes, rejected = advisor.prompt_for_fixes(suggestions)
+        else:
+            fixes, skipped = advisor.select_fixes(suggestions, args.confidence)
+            rejected = []
+            if skipped:
+                print(f"⏭️  Skipped {len(skipped)} links below {args.confidence:.0%} confidence or with tied suggestions")
+        
+        print(f"🔧 Applying {len(fixes)} fixes{' (dry run)' if args.dry_run else ''}...")
+        applied, failed = advisor.apply_fixes(fixes, rejected, workers=args.workers, dry_run=args.dry_run)
+        
+        for fix in applied:
+            print(f"  ✓ {fix.file_path}:{fix.line_number} {fix.broken_link} → {fix.suggested_target}")
+        for fix in failed:
+            print(f"  ✗ {fix.file_path}:{fix.line_number} {fix.broken_link} (target note missing or link not found on line)")
+        
+        print(f"✅ Applied {len(applied)} fixes in {len({fix.file_path for fix in applied})} files")
+        
+        if applied and not args.dry_run:
+            report_file = advisor.update_broken_links_report(data, applied, Path("test-results"))
+            print(f"📋 Updated report saved to: {report_file}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
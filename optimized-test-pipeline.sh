@@ -20,6 +20,9 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 TIMESTAMP=$(date '+%Y%m%d_%H%M%S')
 PIPELINE_LOG="$SCRIPT_DIR/test-results/pipeline_${TIMESTAMP}.log"
 RESULTS_DIR="$SCRIPT_DIR/test-results"
+STAGE_TIMINGS="/tmp/pipeline-stage-timings.txt"
+PROFILE_MODE=""
+AI_PROFILE_ARGS=()
 
 mkdir -p "$RESULTS_DIR"
 
@@ -29,6 +32,54 @@ init_pipeline() {
     echo "Started: $(date)" | tee -a "$PIPELINE_LOG"
     echo "Pipeline ID: $TIMESTAMP" | tee -a "$PIPELINE_LOG"
     echo "" | tee -a "$PIPELINE_LOG"
+    : > "$STAGE_TIMINGS"
+}
+
+# Current time in milliseconds (BSD date on macOS has no %N)
+now_ms() {
+    if [ -n "${EPOCHREALTIME:-}" ]; then
+        local seconds="${EPOCHREALTIME%[.,]*}"
+        local fraction="${EPOCHREALTIME#*[.,]}"
+        echo $(( seconds * 1000 + 10#${fraction:0:3} ))
+    else
+        python3 -c 'import time; print(int(time.time() * 1000))'
+    fi
+}
+
+# Run a pipeline stage and record its duration
+run_stage() {
+    local stage="$1"
+    shift
+    local stage_start=$(now_ms)
+    local status=0
+    
+    "$@" || status=$?
+    
+    echo "$stage|$(( $(now_ms) - stage_start ))|$status" >> "$STAGE_TIMINGS"
+    return $status
+}
+
+# Print per-stage time and call-count breakdown
+print_stage_breakdown() {
+    if [ -s "$STAGE_TIMINGS" ]; then
+        echo -e "${CYAN}Stage Timings:${NC}"
+        awk -F'|' '
+            { calls[$1]++; total[$1] += $2; if (!($1 in order)) { order[$1] = ++n; names[n] = $1 } }
+            END {
+                printf "  %-28s %6s %10s\n", "Stage", "Calls", "Total ms"
+                for (i = 1; i <= n; i++) printf "  %-28s %6d %10d\n", names[i], calls[names[i]], total[names[i]]
+            }' "$STAGE_TIMINGS"
+        echo ""
+    fi
+    
+    local log
+    for log in /tmp/ai-analysis.log /tmp/ai-suggestions.log; do
+        if grep -q "Stage breakdown" "$log" 2>/dev/null; then
+            echo -e "${CYAN}AI Advisor ($(basename "$log" .log)):${NC}"
+            sed -n '/Stage breakdown/,/^$/p' "$log" | tail -n +2
+            grep "Profile saved to" "$log" 2>/dev/null | sed 's/^/  /'
+        fi
+    done
 }
 
 # Log step results
@@ -144,7 +195,7 @@ step4_ai_suggestions() {
     echo "=========================================="
     
     echo -e "${YELLOW}Analyzing existing link patterns...${NC}"
-    if ./ai-link-advisor.py analyze --cortex-path ../cortex > /tmp/ai-analysis.log 2>&1; then
+    if ./ai-link-advisor.py analyze --cortex-path ../cortex "${AI_PROFILE_ARGS[@]}" > /tmp/ai-analysis.log 2>&1; then
         local patterns_count=$(grep "Analyzed" /tmp/ai-analysis.log | awk '{print $2}' | head -1)
         log_step "AI Pattern Analysis" "✅ PASSED" "$patterns_count patterns analyzed"
         echo -e "${GREEN}✅ Pattern analysis completed ($patterns_count patterns)${NC}"
@@ -156,7 +207,7 @@ step4_ai_suggestions() {
     
     echo -e "${YELLOW}Generating intelligent link suggestions...${NC}"
     local suggestions_file="ai-suggestions-pipeline-${TIMESTAMP}.md"
-    if ./ai-link-advisor.py suggest --output "$suggestions_file" > /tmp/ai-suggestions.log 2>&1; then
+    if ./ai-link-advisor.py suggest --output "$suggestions_file" "${AI_PROFILE_ARGS[@]}" > /tmp/ai-suggestions.log 2>&1; then
         local suggestions_count=$(grep "Generated" /tmp/ai-suggestions.log | awk '{print $2}' | head -1)
         log_step "AI Suggestions Generation" "✅ PASSED" "$suggestions_count suggestions generated"
         echo -e "${GREEN}✅ AI suggestions generated ($suggestions_count suggestions)${NC}"
@@ -271,6 +322,8 @@ generate_pipeline_summary() {
     echo -e "  Duration: ${pipeline_duration}s"
     echo ""
     
+    print_stage_breakdown
+    
     echo -e "${CYAN}Steps Completed:${NC}"
     echo "  1. ✅ Cortex System Schutz validiert"
     echo "  2. ✅ Templates validiert & registriert" 
@@ -307,32 +360,60 @@ generate_pipeline_summary() {
 # Main pipeline execution
 main() {
     local skip_step=""
+    local step_arg=""
+    local arg
+    
+    for arg in "$@"; do
+        case "$arg" in
+            "--profile") PROFILE_MODE="pstats" ;;
+            "--profile="*) PROFILE_MODE="${arg#--profile=}" ;;
+            *) [ -z "$step_arg" ] && step_arg="$arg" ;;
+        esac
+    done
     
-    case "${1:-full}" in
+    case "$PROFILE_MODE" in
+        ""|"pstats"|"trace") ;;
+        *)
+            echo -e "${RED}Unknown profile mode: $PROFILE_MODE (use pstats or trace)${NC}"
+            exit 1
+            ;;
+    esac
+    
+    # Extra arguments for the AI advisor when profiling is enabled
+    if [ -n "$PROFILE_MODE" ]; then
+        AI_PROFILE_ARGS=(--profile "$PROFILE_MODE" --profile-dir "$RESULTS_DIR")
+    fi
+    
+    case "${step_arg:-full}" in
         "system"|"1")
             echo "Running Step 1 only: System Protection"
             init_pipeline
-            step1_system_protection
+            run_stage "system_protection" step1_system_protection || { print_stage_breakdown; exit 1; }
+            print_stage_breakdown
             ;;
         "templates"|"2") 
             echo "Running Step 2 only: Template Validation"
             init_pipeline
-            step2_template_validation
+            run_stage "template_validation" step2_template_validation || { print_stage_breakdown; exit 1; }
+            print_stage_breakdown
             ;;
         "links"|"3")
             echo "Running Step 3 only: Link Validation" 
             init_pipeline
-            step3_link_validation
+            run_stage "link_validation" step3_link_validation || { print_stage_breakdown; exit 1; }
+            print_stage_breakdown
             ;;
         "ai"|"4")
             echo "Running Step 4 only: AI Suggestions"
             init_pipeline
-            step4_ai_suggestions
+            run_stage "ai_suggestions" step4_ai_suggestions || { print_stage_breakdown; exit 1; }
+            print_stage_breakdown
             ;;
         "storage"|"5")
             echo "Running Step 5 only: Results Storage"
             init_pipeline
-            step5_results_storage
+            run_stage "results_storage" step5_results_storage || { print_stage_breakdown; exit 1; }
+            print_stage_breakdown
             ;;
         "full"|"")
             echo -e "${BOLD}${PURPLE}🚀 RUNNING FULL OPTIMIZED TEST PIPELINE${NC}"
@@ -342,22 +423,23 @@ main() {
             init_pipeline
             
             # Execute pipeline steps in logical order
-            if step1_system_protection && \
-               step2_template_validation && \
-               step3_link_validation && \
-               step4_ai_suggestions && \
-               step5_results_storage; then
+            if run_stage "system_protection" step1_system_protection && \
+               run_stage "template_validation" step2_template_validation && \
+               run_stage "link_validation" step3_link_validation && \
+               run_stage "ai_suggestions" step4_ai_suggestions && \
+               run_stage "results_storage" step5_results_storage; then
                 
                 generate_pipeline_summary
                 echo -e "${BOLD}${GREEN}🎉 PIPELINE ERFOLGREICH ABGESCHLOSSEN!${NC}"
                 exit 0
             else
+                print_stage_breakdown
                 echo -e "${BOLD}${RED}❌ PIPELINE FEHLER - Überprüfen Sie das Log: $PIPELINE_LOG${NC}"
                 exit 1
             fi
             ;;
         "help"|"-h"|"--help")
-            echo "Usage: $0 [STEP]"
+            echo "Usage: $0 [STEP] [--profile[=pstats|trace]]"
             echo ""
             echo "Steps:"
             echo "  full      Run complete optimized pipeline (default)"
@@ -368,6 +450,10 @@ main() {
             echo "  storage,5 Results storage & dashboard only"
             echo "  help      Show this help"
             echo ""
+            echo "Options:"
+            echo "  --profile         Write cProfile stats of the AI advisor to test-results/"
+            echo "  --profile=trace   Write a Chrome trace-event JSON to test-results/ instead"
+            echo ""
             echo "Optimized sequence ensures:"
             echo "  1. System is protected before testing"
             echo "  2. Templates are valid before link analysis"
@@ -376,7 +462,7 @@ main() {
             echo "  5. All results are properly stored and visualized"
             ;;
         *)
-            echo -e "${RED}Unknown step: $1${NC}"
+            echo -e "${RED}Unknown step: $step_arg${NC}"
             echo "Use '$0 help' for usage information"
             exit 1
             ;;
@@ -394,6 +480,7 @@ cleanup() {
     rm -f /tmp/dashboard.log
     rm -f /tmp/link-health-results.txt
     rm -f /tmp/ai-suggestions-file.txt
+    rm -f "$STAGE_TIMINGS"
 }
 
 # Set up cleanup on exit
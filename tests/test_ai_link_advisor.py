@@ -0,0 +1,227 @@
+"""
+Tests for the AI Link Advisor suggestion cache and apply engine
+"""
+
+import importlib.util
+import json
+import re
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+ADVISOR_PATH = Path(__file__).resolve().parent.parent / "ai-link-advisor.py"
+spec = importlib.util.spec_from_file_location("ai_link_advisor", ADVISOR_PATH)
+ai_link_advisor = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ai_link_advisor)
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Small vault with one note containing a broken link"""
+    cortex = tmp_path / "vault"
+    (cortex / "x").mkdir(parents=True)
+    (cortex / "Source.md").write_text(
+        "# Source\n"
+        "Auth System uses JWT and REST API Template Decision.\n"
+        "See [[Old-Auth-Note]] for details.\n"
+        "Validation Pattern for the Link Process.\n",
+        encoding='utf-8'
+    )
+    (cortex / "Overview.md").write_text("# Overview\nGeneral notes.\n", encoding='utf-8')
+    (cortex / "x" / "Zeta.md").write_text("# Zeta\nunrelated text\n", encoding='utf-8')
+    related = ["Auth System JWT", "Auth System JWT REST", "Auth System JWT REST API", "Auth System JWT REST API Template"]
+    for name, concepts in zip(["Alpha", "Beta", "Gamma", "Delta"], related):
+        (cortex / f"{name}.md").write_text(f"# {name}\n{concepts}\n", encoding='utf-8')
+    return cortex
+
+
+def broken_links(cortex):
+    return [{"file": str(cortex / "Source.md"), "line": 3, "link": "[[Old-Auth-Note]]"}]
+
+
+def targets(advisor, cortex):
+    return sorted((s.suggested_target, s.confidence)
+                  for s in advisor.suggest_fixes_for_broken_links(broken_links(cortex)))
+
+
+def make_advisor(cortex, framework, use_cache=True):
+    return ai_link_advisor.AILinkAdvisor(str(cortex), str(framework), use_cache=use_cache)
+
+
+def test_cache_hit_matches_uncached(vault, tmp_path):
+    cached = make_advisor(vault, tmp_path)
+    targets(cached, vault)
+    warm = targets(cached, vault)
+
+    assert cached.profiler.counters["cache.hits"] == 1
+    assert warm == targets(make_advisor(vault, tmp_path, use_cache=False), vault)
+
+
+def test_editing_unsuggested_note_invalidates_cache(vault, tmp_path):
+    advisor = make_advisor(vault, tmp_path)
+    before = targets(advisor, vault)
+    assert "Zeta" not in [target for target, _ in before]
+
+    with open(vault / "x" / "Zeta.md", 'a', encoding='utf-8') as f:
+        f.write("Auth System JWT REST API Template Decision Validation Pattern\n")
+
+    after = targets(make_advisor(vault, tmp_path), vault)
+    assert after == targets(make_advisor(vault, tmp_path, use_cache=False), vault)
+    assert "Zeta" in [target for target, _ in after]
+
+
+def test_warm_run_matches_cold_run_after_rejection(vault, tmp_path):
+    advisor = make_advisor(vault, tmp_path)
+    suggestions = advisor.suggest_fixes_for_broken_links(broken_links(vault))
+    advisor.record_outcomes([], [suggestions[0]])
+
+    cold = targets(make_advisor(vault, tmp_path), vault)
+    warm = targets(make_advisor(vault, tmp_path), vault)
+
+    assert warm == cold
+    assert suggestions[0].suggested_target not in [target for target, _ in cold]
+
+
+def per_link(advisor, links):
+    result = {}
+    for s in advisor.suggest_fixes_for_broken_links(links):
+        result.setdefault((s.file_path, s.broken_link), []).append((s.suggested_target, s.confidence))
+    return {key: sorted(value) for key, value in result.items()}
+
+
+def test_links_sharing_window_and_target_match_uncached(vault, tmp_path):
+    window = "# Notes\nSee [a](Old-Note.md#sec) and [[Old-Note|alias]] here.\n"
+    (vault / "A.md").write_text(window + "\n\n\n\nKubernetes cluster setup.\n", encoding='utf-8')
+    (vault / "B.md").write_text(window, encoding='utf-8')
+    (vault / "Old-Note2.md").write_text("# Old Note 2\n", encoding='utf-8')
+    links = [{"file": str(vault / name), "line": 2, "link": link}
+             for name in ("A.md", "B.md") for link in ("[a](Old-Note.md#sec)", "[[Old-Note|alias]]")]
+
+    advisor = make_advisor(vault, tmp_path)
+    conn = sqlite3.connect(advisor.db_path)
+    conn.execute("INSERT INTO link_patterns (pattern, target_template, usage_count, success_count) "
+                 "VALUES (?, ?, ?, ?)", ("concepts:Kubernetes", "Target", 5, 5))
+    conn.commit()
+    conn.close()
+
+    expected = per_link(make_advisor(vault, tmp_path, use_cache=False), links)
+    assert any(target == "Target" for target, _ in expected[(str(vault / "A.md"), "Old-Note")])
+    assert all(target != "Target" for target, _ in expected[(str(vault / "B.md"), "Old-Note")])
+    assert ("Old-Note2", 0.8) in expected[(str(vault / "B.md"), "Old-Note")]
+
+    assert per_link(make_advisor(vault, tmp_path), links) == expected
+    assert per_link(make_advisor(vault, tmp_path), links) == expected
+
+
+def fix_for(cortex, line, broken, target):
+    return ai_link_advisor.LinkSuggestion(
+        broken_link=broken, suggested_target=target, confidence=0.9, reasoning="test",
+        context="", file_path=str(cortex / "Links.md"), line_number=line
+    )
+
+
+def test_apply_preserves_aliases_and_anchors(vault, tmp_path):
+    (vault / "x" / "Links.md").write_text(
+        "# Links\n[[Old-Auth-Note#Setup|the auth]] and [old](../Old-Auth-Note.md#setup)\n", encoding='utf-8'
+    )
+    advisor = make_advisor(vault, tmp_path)
+    fixes = [fix_for(vault / "x", 2, "Old-Auth-Note#Setup", "Delta"),
+             fix_for(vault / "x", 2, "old](../Old-Auth-Note.md#setup", "Delta")]
+
+    applied, failed = advisor.apply_fixes(fixes)
+
+    assert len(applied) == 2 and not failed
+    assert (vault / "x" / "Links.md").read_text(encoding='utf-8') == \
+        "# Links\n[[Delta#Setup|the auth]] and [old](../Delta.md#setup)\n"
+
+
+def test_apply_skips_targets_without_note(vault, tmp_path):
+    original = "# Links\n[[Old-Auth-Note]]\n"
+    (vault / "x" / "Links.md").write_text(original, encoding='utf-8')
+    advisor = make_advisor(vault, tmp_path)
+    fix = fix_for(vault / "x", 2, "Old-Auth-Note", "Missing-Note")
+    report = {"total_links": 1, "total_files_scanned": 1, "valid_links": 0, "broken_links_count": 1,
+              "health_score": "0.0%",
+              "broken_links": [{"file": fix.file_path, "line": 2, "link": "[[Old-Auth-Note]]"}]}
+
+    applied, failed = advisor.apply_fixes([fix])
+    updated = advisor.update_broken_links_report(report, [fix], tmp_path)
+
+    assert applied == [] and failed == [fix]
+    assert (vault / "x" / "Links.md").read_text(encoding='utf-8') == original
+    assert json.loads(updated.read_text())["broken_links"] == report["broken_links"]
+
+
+def validator_resolves(cortex, file_path, link):
+    """Mirror how test-manager-enhanced.sh resolves a link target"""
+    wiki = re.fullmatch(r'\[\[([^\]]+)\]\]', link)
+    if wiki:
+        target = wiki.group(1).split('|')[0].split('#')[0].strip()
+        target_path = None
+    else:
+        target = re.fullmatch(r'\[[^\]]*\]\(([^)]+)\)', link).group(1)
+        base = Path(file_path).parent if target.startswith('.') else cortex
+        target_path = base / target
+    if target_path is not None and target_path.is_file():
+        return True
+    # find_target_file: direct match, .md match, then find -name (never matches a '/')
+    if (cortex / target).is_file() or (cortex / f"{target}.md").is_file():
+        return True
+    return any(path.name in (target, f"{target}.md") for path in cortex.rglob("*") if path.is_file())
+
+
+def test_apply_fixes_every_occurrence_in_a_file(tmp_path):
+    cortex = tmp_path / "vault"
+    cortex.mkdir()
+    (cortex / "Old-Note2.md").write_text("# Old Note 2\n", encoding='utf-8')
+    (cortex / "Links.md").write_text("# Links\n" + "[[Old-Note]]\n" * 5, encoding='utf-8')
+    links = [{"file": str(cortex / "Links.md"), "line": line, "link": "[[Old-Note]]"} for line in range(2, 7)]
+
+    advisor = make_advisor(cortex, tmp_path)
+    fixes, skipped = advisor.select_fixes(advisor.suggest_fixes_for_broken_links(links), 0.7)
+    applied, failed = advisor.apply_fixes(fixes)
+
+    assert len(applied) == 5 and not failed and not skipped
+    assert (cortex / "Links.md").read_text(encoding='utf-8') == "# Links\n" + "[[Old-Note2]]\n" * 5
+
+
+def test_apply_output_resolves_for_validator(vault, tmp_path):
+    (vault / "x" / "y").mkdir()
+    (vault / "x" / "y" / "Target-Note.md").write_text("# Target\n", encoding='utf-8')
+    (vault / "x" / "Links.md").write_text(
+        "# Links\n[down](Old-A.md)\n[side](Old-B.md)\n[[Old-C]]\n", encoding='utf-8'
+    )
+    advisor = make_advisor(vault, tmp_path)
+    fixes = [fix_for(vault / "x", 2, "down](Old-A.md", "Target-Note"),
+             fix_for(vault / "x", 3, "side](Old-B.md", "Zeta"),
+             fix_for(vault / "x", 4, "Old-C", "../adr/Target-Note.md")]
+
+    applied, failed = advisor.apply_fixes(fixes)
+
+    assert len(applied) == 3 and not failed
+    lines = (vault / "x" / "Links.md").read_text(encoding='utf-8').splitlines()[1:]
+    assert lines == ["[down](./y/Target-Note.md)", "[side](./Zeta.md)", "[[Target-Note]]"]
+    for line in lines:
+        assert validator_resolves(vault, vault / "x" / "Links.md", line)
+
+
+def test_apply_skips_ambiguous_wiki_target(vault, tmp_path):
+    (vault / "x" / "Delta.md").write_text("# Second Delta\n", encoding='utf-8')
+    original = "# Links\n[[Old-Auth-Note]]\n"
+    (vault / "x" / "Links.md").write_text(original, encoding='utf-8')
+
+    applied, failed = make_advisor(vault, tmp_path).apply_fixes([fix_for(vault / "x", 2, "Old-Auth-Note", "Delta")])
+
+    assert applied == [] and len(failed) == 1
+    assert (vault / "x" / "Links.md").read_text(encoding='utf-8') == original
+
+
+def test_prompt_for_fixes_treats_eof_as_quit(vault, tmp_path, monkeypatch):
+    def no_input(prompt):
+        raise EOFError
+
+    monkeypatch.setattr("builtins.input", no_input)
+    advisor = make_advisor(vault, tmp_path)
+
+    assert advisor.prompt_for_fixes([fix_for(vault, 2, "Old-Auth-Note", "Delta")]) == ([], [])
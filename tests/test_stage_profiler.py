@@ -0,0 +1,101 @@
+"""
+Tests for the AI Link Advisor stage profiler and profile output
+"""
+
+import argparse
+import cProfile
+import importlib.util
+import json
+import pstats
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ADVISOR_PATH = Path(__file__).resolve().parent.parent / "ai-link-advisor.py"
+spec = importlib.util.spec_from_file_location("ai_link_advisor", ADVISOR_PATH)
+ai_link_advisor = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ai_link_advisor)
+
+
+def test_stage_counts_calls_and_nesting():
+    profiler = ai_link_advisor.StageProfiler()
+    for _ in range(3):
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                pass
+
+    assert profiler.stages["outer"][0] == 3
+    assert profiler.stages["inner"][0] == 3
+    assert profiler.stages["outer"][1] >= profiler.stages["inner"][1]
+
+
+def test_stage_records_time_when_block_raises():
+    profiler = ai_link_advisor.StageProfiler()
+    try:
+        with profiler.stage("failing"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    assert profiler.stages["failing"][0] == 1
+
+
+def test_summary_reports_stages_and_counters():
+    profiler = ai_link_advisor.StageProfiler()
+    with profiler.stage("db.init"):
+        pass
+    profiler.count("cache.hits")
+    profiler.count("cache.hits", 2)
+
+    summary = profiler.summary()
+
+    assert summary["stages"]["db.init"]["calls"] == 1
+    assert summary["stages"]["db.init"]["total_ms"] >= 0
+    assert summary["counters"] == {"cache.hits": 3}
+
+
+def test_write_trace_emits_complete_events(tmp_path):
+    profiler = ai_link_advisor.StageProfiler(trace=True)
+    with profiler.stage("vault.walk"):
+        with profiler.stage("file.read"):
+            pass
+
+    output_file = tmp_path / "trace.json"
+    profiler.write_trace(output_file)
+    trace = json.loads(output_file.read_text())
+
+    events = trace["traceEvents"]
+    assert [event["name"] for event in events] == ["file.read", "vault.walk"]
+    for event in events:
+        assert event["ph"] == "X"
+        assert event["cat"] == event["name"].split('.')[0]
+        assert {"ts", "dur", "pid", "tid"} <= set(event)
+    assert events[1]["ts"] <= events[0]["ts"]
+    assert events[1]["dur"] >= events[0]["dur"]
+
+
+def test_trace_disabled_records_no_events():
+    profiler = ai_link_advisor.StageProfiler()
+    with profiler.stage("rank"):
+        pass
+
+    assert profiler.events == []
+
+
+def worker_task():
+    return sum(range(1000))
+
+
+def test_pstats_output_includes_worker_threads(tmp_path):
+    profiler = ai_link_advisor.StageProfiler(profile_threads=True)
+    main_profile = cProfile.Profile()
+    main_profile.enable()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(lambda _: profiler.in_thread(worker_task)(), range(2)))
+    main_profile.disable()
+
+    args = argparse.Namespace(profile_dir=str(tmp_path), command="apply")
+    ai_link_advisor.write_profile_output(args, profiler, main_profile)
+
+    output_file = next(tmp_path.glob("profile_apply_*.pstats"))
+    functions = {name for _, _, name in pstats.Stats(str(output_file)).stats}
+    assert "worker_task" in functions